@@ -3,23 +3,103 @@ from shinywidgets import output_widget, render_plotly
 import plotly.express as px
 import plotly.graph_objects as go
 from data_utils import (
-    fetch_daily_metrics, fetch_user_metrics,
-    process_daily_metrics, process_user_metrics,
-    get_metric_info, format_large_number
+    load_daily_metrics_async, load_user_metrics,
+    get_metric_info, format_large_number, rolling_mean,
+    WEEKDAY_CAT, HOUR_CAT, HEATMAP_KEY_COLS
 )
 import pandas as pd
 import numpy as np
 import logging
 from datetime import datetime
-import tempfile
+from functools import lru_cache
+import asyncio
+import io
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Load initial data
-logger.info("Fetching initial data...")
-daily_df = process_daily_metrics(fetch_daily_metrics())
+daily_df = pd.DataFrame()
+# Bumped whenever daily_df is refreshed to invalidate cached derivations
+daily_version = 0
+
+async def refresh_daily_metrics():
+    """Reload daily_df without blocking the event loop and bump its version"""
+    global daily_df, daily_version
+    df = await load_daily_metrics_async()
+    if not df.empty:
+        daily_df = df
+        daily_version += 1
+    return df
+
+# Shared initial load, started by the first session rather than at import so
+# pages render before The Graph responds
+_daily_task = None
+
+async def _load_initial_daily_metrics():
+    """Run the initial daily load, returning an empty frame if it fails"""
+    global _daily_task
+    logger.info("Fetching initial data...")
+    try:
+        df = await refresh_daily_metrics()
+    except Exception as e:
+        logger.error(f"Error loading daily metrics: {str(e)}")
+        df = pd.DataFrame()
+    
+    # Fetch errors surface as an empty frame; clear the task so the next
+    # session retries instead of reusing the failed load
+    if df.empty:
+        _daily_task = None
+    return df
+
+def get_initial_daily_metrics():
+    """Task for the shared initial daily load, started on first use"""
+    global _daily_task
+    if _daily_task is None:
+        _daily_task = asyncio.create_task(_load_initial_daily_metrics())
+    return _daily_task
+
+@lru_cache(maxsize=1)
+def _global_heatmap_pivot(version):
+    """Average transfer counts by weekday/hour for the given data version"""
+    # Using mean for the global view; weekday is already WEEKDAY_CAT, so group
+    # on the cached columns directly rather than on a copy of the frame
+    pivot = daily_df['transferCount'].groupby(
+        [daily_df['weekday'], daily_df['hour'].astype(HOUR_CAT)],
+        observed=False
+    ).mean().unstack().fillna(0)
+    return pivot.values, pivot.index.tolist(), pivot.columns.tolist()
+
+def to_csv_bytes(df):
+    """Serialize a frame to CSV in memory"""
+    buf = io.BytesIO()
+    df.to_csv(buf, index=False, chunksize=10000)
+    return buf.getvalue()
+
+def histogram_bar(values, name, bins=30):
+    """Bin values server-side so only bar heights are sent to the browser"""
+    arr = values.to_numpy(dtype=np.float64, na_value=np.nan)
+    # np.histogram rejects non-finite values when autodetecting the range
+    counts, edges = np.histogram(arr[np.isfinite(arr)], bins=bins)
+    return go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2,
+        y=counts,
+        width=np.diff(edges),
+        name=name
+    )
+
+@lru_cache(maxsize=1)
+def _global_csv(version):
+    """CSV export of daily_df for the given data version"""
+    return to_csv_bytes(daily_df.drop(columns=HEATMAP_KEY_COLS, errors='ignore'))
+
+@lru_cache(maxsize=64)
+def _global_moving_average(metric, window, version):
+    """Moving average of a daily_df metric for the given data version"""
+    return rolling_mean(daily_df[metric].to_numpy(dtype=np.float64), window)
+
+# Rows shown in the raw data previews; downloads export everything
+PREVIEW_ROWS = 100
 
 # Get metric information
 metric_info = get_metric_info()
@@ -222,15 +302,28 @@ app_ui = ui.page_fluid(
 )
 
 def server(input, output, session):
-    # Create reactive value for user data
+    # Create reactive values for global and user data
+    daily_data = reactive.Value(daily_df)
     user_data = reactive.Value(pd.DataFrame())
     
+    async def load_daily_data():
+        df = await get_initial_daily_metrics()
+        # Runs outside any reactive flush, so take the lock and flush ourselves
+        async with reactive.lock():
+            daily_data.set(df)
+            await reactive.flush()
+    
+    # Load in a background task rather than an effect, so the first flush
+    # sends the empty-state outputs without waiting for the network
+    if daily_df.empty:
+        session.on_ended(asyncio.create_task(load_daily_data()).cancel)
+    
     @reactive.Effect
     @reactive.event(input.lookup)
     def update_user_data():
         address = input.address()
         if address:
-            data = process_user_metrics(fetch_user_metrics(address))
+            data = load_user_metrics(address)
             user_data.set(data)
             if data.empty:
                 ui.notification_show(
@@ -247,23 +340,26 @@ def server(input, output, session):
     @output
     @render.text
     def daily_volume():
-        if daily_df.empty:
+        df = daily_data.get()
+        if df.empty:
             return "N/A"
-        return format_large_number(daily_df.iloc[-1]['volume'])
+        return format_large_number(df.iloc[-1]['volume'])
 
     @output
     @render.text
     def active_users():
-        if daily_df.empty:
+        df = daily_data.get()
+        if df.empty:
             return "N/A"
-        return format_large_number(daily_df.iloc[-1]['activeAccounts'])
+        return format_large_number(df.iloc[-1]['activeAccounts'])
 
     @output
     @render.text
     def new_users():
-        if daily_df.empty:
+        df = daily_data.get()
+        if df.empty:
             return "N/A"
-        return format_large_number(daily_df.iloc[-1]['newAccounts'])
+        return format_large_number(df.iloc[-1]['newAccounts'])
 
     # User metrics text outputs
     @output
@@ -294,24 +390,25 @@ def server(input, output, session):
     @output
     @render_plotly
     def global_time_series():
-        if daily_df.empty:
+        df = daily_data.get()
+        if df.empty:
             return create_empty_plot("Global Metrics Over Time")
             
         metric = input.global_metric()
         metric_name = global_metrics[metric]['name']
         
         fig = go.Figure()
-        fig.add_trace(go.Scatter(
-            x=daily_df['timestamp'],
-            y=daily_df[metric],
+        fig.add_trace(go.Scattergl(
+            x=df['timestamp'],
+            y=df[metric],
             mode='lines',
             name=metric_name
         ))
         
-        if len(daily_df) >= input.global_ma_window():
-            ma = daily_df[metric].rolling(window=input.global_ma_window(), min_periods=1).mean()
-            fig.add_trace(go.Scatter(
-                x=daily_df['timestamp'],
+        if len(df) >= input.global_ma_window():
+            ma = _global_moving_average(metric, input.global_ma_window(), daily_version)
+            fig.add_trace(go.Scattergl(
+                x=df['timestamp'],
                 y=ma,
                 mode='lines',
                 line=dict(dash='dash'),
@@ -328,15 +425,12 @@ def server(input, output, session):
     @output
     @render_plotly
     def global_transfer_distribution():
-        if daily_df.empty:
+        df = daily_data.get()
+        if df.empty:
             return create_empty_plot("Transfer Distribution")
             
         fig = go.Figure()
-        fig.add_trace(go.Histogram(
-            x=daily_df['averageTransferAmount'],
-            nbinsx=30,
-            name="Transfers"
-        ))
+        fig.add_trace(histogram_bar(df['averageTransferAmount'], "Transfers"))
         
         fig.update_layout(
             title="Global Transfer Amount Distribution",
@@ -349,27 +443,16 @@ def server(input, output, session):
     @output
     @render_plotly
     def global_activity_heatmap():
-        if daily_df.empty:
+        df = daily_data.get()
+        if df.empty:
             return create_empty_plot("Activity Heatmap")
             
-        # Convert timestamp to hour and weekday
-        df = daily_df.copy()
-        df['hour'] = df['timestamp'].dt.hour
-        df['weekday'] = df['timestamp'].dt.day_name()
-        
-        # Create pivot table of transfer counts
-        pivot = df.pivot_table(
-            values='transferCount',
-            index='weekday',
-            columns='hour',
-            aggfunc='mean',  # Using mean for the global view
-            fill_value=0
-        )
+        z, weekdays, hours = _global_heatmap_pivot(daily_version)
         
         fig = go.Figure(data=go.Heatmap(
-            z=pivot.values,
-            x=[str(h) for h in range(24)],
-            y=pivot.index,
+            z=z,
+            x=[str(h) for h in hours],
+            y=weekdays,
             colorscale='Viridis'
         ))
         
@@ -393,7 +476,7 @@ def server(input, output, session):
         metric_name = user_metrics[metric]['name']
         
         fig = go.Figure()
-        fig.add_trace(go.Scatter(
+        fig.add_trace(go.Scattergl(
             x=df['date'],
             y=df[metric],
             mode='lines',
@@ -401,8 +484,8 @@ def server(input, output, session):
         ))
         
         if len(df) >= input.user_ma_window():
-            ma = df[metric].rolling(window=input.user_ma_window(), min_periods=1).mean()
-            fig.add_trace(go.Scatter(
+            ma = rolling_mean(df[metric].to_numpy(dtype=np.float64), input.user_ma_window())
+            fig.add_trace(go.Scattergl(
                 x=df['date'],
                 y=ma,
                 mode='lines',
@@ -425,11 +508,7 @@ def server(input, output, session):
             return create_empty_plot("Transfer Distribution")
             
         fig = go.Figure()
-        fig.add_trace(go.Histogram(
-            x=df['averageTransferAmount'],
-            nbinsx=30,
-            name="Transfers"
-        ))
+        fig.add_trace(histogram_bar(df['averageTransferAmount'], "Transfers"))
         
         fig.update_layout(
             title="Transfer Amount Distribution",
@@ -446,16 +525,13 @@ def server(input, output, session):
         if df.empty:
             return create_empty_plot("Activity Heatmap")
             
-        df['hour'] = df['timestamp'].dt.hour
-        df['weekday'] = df['timestamp'].dt.day_name()
+        weekday = df['timestamp'].dt.day_name().astype(WEEKDAY_CAT)
+        hour = df['timestamp'].dt.hour.astype(HOUR_CAT)
         
-        pivot = df.pivot_table(
-            values='transferCount',
-            index='weekday',
-            columns='hour',
-            aggfunc='sum',
-            fill_value=0
-        )
+        pivot = df['transferCount'].groupby(
+            [weekday, hour],
+            observed=False
+        ).sum().unstack(fill_value=0)
         
         fig = go.Figure(data=go.Heatmap(
             z=pivot.values,
@@ -490,23 +566,31 @@ def server(input, output, session):
     @output
     @render.data_frame
     def global_data_table():
-        return render.DataGrid(daily_df)
+        return render.DataGrid(
+            daily_data.get().drop(columns=HEATMAP_KEY_COLS, errors='ignore').tail(PREVIEW_ROWS),
+            width="100%",
+            height="400px",
+            summary=False,
+            filters=False
+        )
 
     @output
     @render.data_frame
     def user_data_table():
-        return render.DataGrid(user_data.get())
+        return render.DataGrid(
+            user_data.get().tail(PREVIEW_ROWS),
+            width="100%",
+            height="400px",
+            summary=False,
+            filters=False
+        )
 
     @session.download(filename="global_metrics.csv")
     async def download_global_data():
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False) as tmp:
-            daily_df.to_csv(tmp.name, index=False)
-            return tmp.name
+        yield _global_csv(daily_version)
 
     @session.download(filename="user_metrics.csv")
     async def download_user_data():
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False) as tmp:
-            user_data.get().to_csv(tmp.name, index=False)
-            return tmp.name
+        yield to_csv_bytes(user_data.get())
 
 app = App(app_ui, server)
\ No newline at end of file
@@ -1,5 +1,11 @@
+import os
+import sys
+import time
+import asyncio
 import requests
+import orjson
 import pandas as pd
+from cachetools import TTLCache
 from datetime import datetime, timedelta
 import logging
 import numpy as np
@@ -7,47 +13,112 @@ import numpy as np
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Shared session so repeated queries reuse the TCP/TLS connection
+session = requests.Session()
+session.headers.update({
+    'Content-Type': 'application/json',
+    'Accept-Encoding': 'gzip'
+})
+
+SUBGRAPH_URL = "https://gateway.thegraph.com/api/35a11a8ff03ad3b8f19a3cecf1b73b58/subgraphs/id/C92DhHwGBxuUhuEvPRnNpMSRF3XEVSuS8acsNr3NvVFN"
+
+DAILY_METRIC_COLS = [
+    'activeAccounts', 'averageTransferAmount', 'blacklistedAccounts',
+    'fee', 'hasFeeDecrease', 'hasFeeIncrease', 'id', 'minTransferAmount',
+    'maxTransferAmount', 'newAccounts', 'timestamp', 'totalFees',
+    'totalTransferValue', 'totalTransfers', 'transferCount',
+    'uniqueReceivers', 'uniqueSenders', 'volume'
+]
+
+# Fixed weekday/hour grid used to key the activity heatmaps
+WEEKDAY_CAT = pd.CategoricalDtype(
+    ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'],
+    ordered=True
+)
+HOUR_CAT = pd.CategoricalDtype(range(24), ordered=True)
+# Heatmap-only helper columns added to the daily frame; not part of exports
+HEATMAP_KEY_COLS = ['hour', 'weekday']
+
+# Processed frames are cached on disk as Feather and reused while fresh
+CACHE_DIR = 'cache'
+CACHE_TTL = 3600  # seconds
+# Part of every cache file name; bump whenever the columns or dtypes of the
+# processed frames change so files written by older code are never served
+CACHE_SCHEMA_VERSION = 2
+
+# Processed user frames keyed by lowercased address, so repeat lookups of
+# the same wallet skip the disk read as well as the network round-trip
+_user_metrics_cache = TTLCache(maxsize=128, ttl=300)
+
+USER_METRIC_COLS = [
+    'timestamp', 'date', 'endDayBalance', 'totalReceived', 'totalTransferred',
+    'transferCount', 'averageTransferAmount', 'distinctReceivers',
+    'distinctSenders', 'feesPaid', 'maxTransferAmount', 'receivedCount', 'user'
+]
+
+DAILY_METRICS_QUERY = """
+{
+    dailyMetrics(
+        orderBy: timestamp
+        orderDirection: desc
+        first: 1000
+    ) {
+        activeAccounts
+        averageTransferAmount
+        blacklistedAccounts
+        fee
+        hasFeeDecrease
+        hasFeeIncrease
+        id
+        minTransferAmount
+        maxTransferAmount
+        newAccounts
+        timestamp
+        totalFees
+        totalTransferValue
+        totalTransfers
+        transferCount
+        uniqueReceivers
+        uniqueSenders
+        volume
+    }
+}
+"""
+
+def _daily_metrics_frame(data):
+    """Build the raw daily metrics frame from a decoded GraphQL response"""
+    if 'errors' in data:
+        logger.error(f"GraphQL Errors: {data['errors']}")
+        return pd.DataFrame()
+        
+    metrics = data['data']['dailyMetrics']
+    logger.info(f"Fetched {len(metrics)} daily metrics records")
+    return pd.DataFrame.from_records(metrics, columns=DAILY_METRIC_COLS)
+
 def fetch_daily_metrics():
     """Fetch global daily metrics from The Graph"""
-    url = "https://gateway.thegraph.com/api/35a11a8ff03ad3b8f19a3cecf1b73b58/subgraphs/id/C92DhHwGBxuUhuEvPRnNpMSRF3XEVSuS8acsNr3NvVFN"
-    
-    query = """
-    {
-        dailyMetrics {
-            activeAccounts
-            averageTransferAmount
-            blacklistedAccounts
-            fee
-            hasFeeDecrease
-            hasFeeIncrease
-            id
-            minTransferAmount
-            maxTransferAmount
-            newAccounts
-            timestamp
-            totalFees
-            totalTransferValue
-            totalTransfers
-            transferCount
-            uniqueReceivers
-            uniqueSenders
-            volume
-        }
-    }
-    """
-    
     try:
-        response = requests.post(url, json={'query': query})
+        response = session.post(SUBGRAPH_URL, data=orjson.dumps({'query': DAILY_METRICS_QUERY}))
         response.raise_for_status()
-        data = response.json()
+        return _daily_metrics_frame(orjson.loads(response.content))
         
-        if 'errors' in data:
-            logger.error(f"GraphQL Errors: {data['errors']}")
-            return pd.DataFrame()
-            
-        metrics = data['data']['dailyMetrics']
-        logger.info(f"Fetched {len(metrics)} daily metrics records")
-        return pd.DataFrame(metrics)
+    except Exception as e:
+        logger.error(f"Error fetching daily metrics: {str(e)}")
+        return pd.DataFrame()
+
+async def _fetch_daily_metrics_browser():
+    """Fetch global daily metrics through the browser's fetch API (Pyodide)"""
+    from pyodide.http import pyfetch
+    
+    try:
+        response = await pyfetch(
+            SUBGRAPH_URL,
+            method='POST',
+            headers={'Content-Type': 'application/json'},
+            body=orjson.dumps({'query': DAILY_METRICS_QUERY}).decode()
+        )
+        response.raise_for_status()
+        return _daily_metrics_frame(orjson.loads(await response.bytes()))
         
     except Exception as e:
         logger.error(f"Error fetching daily metrics: {str(e)}")
@@ -55,13 +126,13 @@ def fetch_daily_metrics():
 
 def fetch_user_metrics(address):
     """Fetch metrics for a specific user address"""
-    url = "https://gateway.thegraph.com/api/35a11a8ff03ad3b8f19a3cecf1b73b58/subgraphs/id/C92DhHwGBxuUhuEvPRnNpMSRF3XEVSuS8acsNr3NvVFN"
-    
+    # Constant query text with the address passed as a variable keeps the
+    # request cacheable across lookups
     query = """
-    {
+    query($user: String!) {
         userDailyMetrics(
             where: {
-                user: "%s"
+                user: $user
             }
             orderBy: timestamp
             orderDirection: desc
@@ -85,12 +156,15 @@ def fetch_user_metrics(address):
             }
         }
     }
-    """ % address
+    """
     
     try:
-        response = requests.post(url, json={'query': query})
+        response = session.post(SUBGRAPH_URL, data=orjson.dumps({
+            'query': query,
+            'variables': {'user': address}
+        }))
         response.raise_for_status()
-        data = response.json()
+        data = orjson.loads(response.content)
         
         if 'errors' in data:
             logger.error(f"GraphQL Errors: {data['errors']}")
@@ -98,12 +172,24 @@ def fetch_user_metrics(address):
             
         metrics = data['data']['userDailyMetrics']
         logger.info(f"Fetched {len(metrics)} records for address {address}")
-        return pd.DataFrame(metrics)
+        return pd.DataFrame.from_records(metrics, columns=USER_METRIC_COLS)
         
     except Exception as e:
         logger.error(f"Error fetching user metrics: {str(e)}")
         return pd.DataFrame()
 
+def downcast_counts(df, count_cols):
+    """Shrink integer count columns to the smallest unsigned int type"""
+    # Amount columns stay float64: float32 would alter 6-decimal USDT values
+    return df.assign(**df[count_cols].apply(pd.to_numeric, downcast='unsigned'))
+
+def convert_string_columns(df):
+    """Store object string columns as Arrow-backed strings"""
+    str_cols = df.select_dtypes(include='object').columns
+    if len(str_cols):
+        df[str_cols] = df[str_cols].astype('string[pyarrow]')
+    return df
+
 def process_daily_metrics(df):
     """Process global daily metrics data"""
     if df.empty:
@@ -112,6 +198,10 @@ def process_daily_metrics(df):
     # Convert timestamp to datetime
     df['timestamp'] = pd.to_datetime(df['timestamp'].astype(int), unit='s')
     
+    # Precompute heatmap keys once instead of on every redraw
+    df['hour'] = df['timestamp'].dt.hour.astype('int8')
+    df['weekday'] = df['timestamp'].dt.day_name().astype(WEEKDAY_CAT)
+    
     # Convert numeric columns
     numeric_cols = [
         'activeAccounts', 'averageTransferAmount', 'blacklistedAccounts',
@@ -120,24 +210,34 @@ def process_daily_metrics(df):
         'uniqueReceivers', 'uniqueSenders', 'volume'
     ]
     
-    for col in numeric_cols:
-        df[col] = pd.to_numeric(df[col], errors='coerce')
+    df[numeric_cols] = df[numeric_cols].apply(pd.to_numeric, errors='coerce')
+    
+    # Downcast counts to cut memory traffic in later ops
+    count_cols = [
+        'activeAccounts', 'blacklistedAccounts', 'newAccounts',
+        'totalTransfers', 'transferCount', 'uniqueReceivers', 'uniqueSenders'
+    ]
+    df = downcast_counts(df, count_cols)
     
     # Convert boolean columns
     df['hasFeeDecrease'] = df['hasFeeDecrease'].astype(bool)
     df['hasFeeIncrease'] = df['hasFeeIncrease'].astype(bool)
     
-    return df.sort_values('timestamp')
+    # Response is desc-ordered by the server; reverse to ascending
+    df = df.iloc[::-1].reset_index(drop=True)
+    if not df['timestamp'].is_monotonic_increasing:
+        df = df.sort_values('timestamp', ignore_index=True)
+    return convert_string_columns(df)
 
 def process_user_metrics(df):
     """Process user-specific metrics data"""
     if df.empty:
         return df
     
-    # Extract user fields
-    df['user_address'] = df['user'].apply(lambda x: x['address'])
-    df['user_balance'] = df['user'].apply(lambda x: float(x['balance']))
-    df.drop('user', axis=1, inplace=True)
+    # Extract user fields in a single pass over the nested records
+    user_df = pd.DataFrame(df.pop('user').tolist())
+    df['user_address'] = user_df['address'].values
+    df['user_balance'] = pd.to_numeric(user_df['balance'], errors='coerce').values
     
     # Convert timestamps
     df['timestamp'] = pd.to_datetime(df['timestamp'].astype(int), unit='s')
@@ -150,10 +250,109 @@ def process_user_metrics(df):
         'distinctSenders', 'feesPaid', 'maxTransferAmount', 'receivedCount'
     ]
     
-    for col in numeric_cols:
-        df[col] = pd.to_numeric(df[col], errors='coerce')
+    df[numeric_cols] = df[numeric_cols].apply(pd.to_numeric, errors='coerce')
+    
+    # Downcast counts to cut memory traffic in later ops
+    count_cols = [
+        'transferCount', 'distinctReceivers', 'distinctSenders', 'receivedCount'
+    ]
+    df = downcast_counts(df, count_cols)
     
-    return df.sort_values('date')
+    # Response is desc-ordered by the server; reverse to ascending
+    df = df.iloc[::-1].reset_index(drop=True)
+    if not df['date'].is_monotonic_increasing:
+        df = df.sort_values('date', ignore_index=True)
+    return convert_string_columns(df)
+
+def _read_cached_frame(path):
+    """Read a cached frame if it exists and is younger than CACHE_TTL"""
+    try:
+        if time.time() - os.path.getmtime(path) < CACHE_TTL:
+            return pd.read_feather(path)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"Error reading cache {path}: {str(e)}")
+    return None
+
+def _write_cached_frame(df, path):
+    """Persist a processed frame to the cache directory"""
+    if df.empty:
+        return
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        df.reset_index(drop=True).to_feather(path)
+    except Exception as e:
+        logger.warning(f"Error writing cache {path}: {str(e)}")
+
+def _daily_cache_path():
+    """Cache file for the processed daily metrics"""
+    return os.path.join(CACHE_DIR, f"daily_metrics_v{CACHE_SCHEMA_VERSION}.feather")
+
+def load_daily_metrics():
+    """Load processed daily metrics from the disk cache, fetching when stale"""
+    path = _daily_cache_path()
+    df = _read_cached_frame(path)
+    if df is not None:
+        logger.info(f"Loaded {len(df)} daily metrics records from cache")
+        return df
+    
+    df = process_daily_metrics(fetch_daily_metrics())
+    _write_cached_frame(df, path)
+    return df
+
+async def load_daily_metrics_async():
+    """Load processed daily metrics without blocking the event loop"""
+    if sys.platform != 'emscripten':
+        return await asyncio.to_thread(load_daily_metrics)
+    
+    # Pyodide cannot start threads, so fetch through the browser instead
+    path = _daily_cache_path()
+    df = _read_cached_frame(path)
+    if df is not None:
+        logger.info(f"Loaded {len(df)} daily metrics records from cache")
+        return df
+    
+    df = process_daily_metrics(await _fetch_daily_metrics_browser())
+    _write_cached_frame(df, path)
+    return df
+
+def load_user_metrics(address):
+    """Load processed metrics for an address from the disk cache, fetching when stale"""
+    key = address.lower()
+    if key in _user_metrics_cache:
+        return _user_metrics_cache[key]
+    
+    # Only plain hex addresses are safe to use as file names
+    path = os.path.join(CACHE_DIR, f"user_{key}_v{CACHE_SCHEMA_VERSION}.feather") if key.isalnum() else None
+    
+    df = _read_cached_frame(path) if path else None
+    if df is not None:
+        logger.info(f"Loaded {len(df)} records for address {address} from cache")
+    else:
+        df = process_user_metrics(fetch_user_metrics(address))
+        if path:
+            _write_cached_frame(df, path)
+    
+    # Empty results may be transient fetch errors, so don't memoize them
+    if not df.empty:
+        _user_metrics_cache[key] = df
+    return df
+
+def rolling_mean(values, window):
+    """Trailing moving average with min_periods=1 semantics, skipping NaNs"""
+    arr = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(arr)
+    
+    # Running sums let every window be computed with one subtraction
+    sums = np.concatenate(([0.0], np.cumsum(np.where(valid, arr, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(valid)))
+    end = np.arange(1, len(arr) + 1)
+    start = np.maximum(end - window, 0)
+    
+    window_counts = counts[end] - counts[start]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(window_counts > 0, (sums[end] - sums[start]) / window_counts, np.nan)
 
 def get_metric_info():
     """Get information about available metrics and their descriptions"""
@@ -180,14 +379,26 @@ def get_metric_info():
         }
     }
 
+_THRESHOLDS = np.array([1e3, 1e6, 1e9])
+_DIVISORS = np.array([1, 1e3, 1e6, 1e9])
+_SUFFIXES = np.array(['', 'K', 'M', 'B'])
+
+def format_large_numbers(values):
+    """Format an array of large numbers for display"""
+    # Treat anything pd.isna flags (NaN, None, pd.NA, NaT) as missing before
+    # the float cast, which would otherwise reject pd.NA
+    series = pd.Series(values)
+    missing = series.isna().to_numpy()
+    numeric = pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    arr = np.where(missing, np.nan, numeric)
+    idx = np.digitize(np.abs(arr), _THRESHOLDS)
+    scaled = arr / _DIVISORS[idx]
+    
+    # Unscaled values keep two decimals, suffixed ones keep one
+    text = np.where(idx == 0, np.char.mod('%.2f', scaled), np.char.mod('%.1f', scaled))
+    text = np.char.add(text, _SUFFIXES[idx])
+    return np.where(np.isnan(arr), 'N/A', text)
+
 def format_large_number(num):
     """Format large numbers for display"""
-    if pd.isna(num):
-        return "N/A"
-    if abs(num) >= 1e9:
-        return f"{num/1e9:.1f}B"
-    if abs(num) >= 1e6:
-        return f"{num/1e6:.1f}M"
-    if abs(num) >= 1e3:
-        return f"{num/1e3:.1f}K"
-    return f"{num:.2f}"
\ No newline at end of file
+    return str(format_large_numbers([num])[0])
\ No newline at end of file
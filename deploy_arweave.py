@@ -1,11 +1,12 @@
 import os
-import json
+import io
 import time
+import tarfile
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import arweave
 from arweave.arweave_lib import Wallet, Transaction
-import base64
 
 class ArweaveUploader:
     def __init__(self, keyfile_path="arweave_keyfile.json"):
@@ -25,32 +26,32 @@ class ArweaveUploader:
             print(f"Error getting wallet info: {e}")
             return None
 
+    def pack_files(self, files):
+        """Pack a {path: bytes} dictionary into a gzipped tar archive"""
+        buf = io.BytesIO()
+        with tarfile.open(fileobj=buf, mode='w:gz', compresslevel=6) as tar:
+            for filepath, content in files.items():
+                info = tarfile.TarInfo(filepath)
+                info.size = len(content)
+                tar.addfile(info, io.BytesIO(content))
+        return buf.getvalue()
+
     def upload_data(self, data, tags=None):
         """Upload data to Arweave with optional tags"""
         try:
-            # Convert binary files dictionary to JSON-serializable format
-            json_data = {}
-            for filepath, content in data.items():
-                # Convert binary content to base64
-                base64_content = base64.b64encode(content).decode('utf-8')
-                json_data[filepath] = {
-                    'content': base64_content,
-                    'encoding': 'base64'
-                }
-            
-            # Convert to JSON string
-            json_string = json.dumps(json_data)
+            # Pack binary files dictionary into a gzipped tarball
+            archive = self.pack_files(data)
             
             # Create transaction with data
-            transaction = Transaction(self.wallet, data=json_string)
+            transaction = Transaction(self.wallet, data=archive)
             
             # Add tags if provided
             if tags:
                 for tag in tags:
                     transaction.add_tag(tag['name'], tag['value'])
             
-            # Add manifest tag for directory structure
-            transaction.add_tag('Content-Type', 'application/x.arweave-manifest+json')
+            # Add content type tag for the archive
+            transaction.add_tag('Content-Type', 'application/gzip')
             
             # Sign transaction
             transaction.sign()
@@ -61,7 +62,7 @@ class ArweaveUploader:
             return {
                 'success': True,
                 'transaction_id': transaction.id,
-                'data_size': len(json_string)
+                'data_size': len(archive)
             }
         except Exception as e:
             print(f"Error uploading to Arweave: {e}")
@@ -71,10 +72,11 @@ class ArweaveUploader:
             }
 
     def monitor_transaction(self, tx_id, timeout=60, check_interval=5):
-        """Monitor transaction status with timeout"""
+        """Monitor transaction status with timeout, backing off up to check_interval"""
         print("\nMonitoring transaction status...")
         start_time = time.time()
         transaction = Transaction(self.wallet, id=tx_id)
+        delay = 1.0
         
         while True:
             status = transaction.get_status()
@@ -86,12 +88,19 @@ class ArweaveUploader:
                 return True
                 
             # Check timeout
-            if time.time() - start_time > timeout:
+            elapsed = time.time() - start_time
+            if elapsed > timeout:
                 print(f"\nTimeout reached ({timeout} seconds). Final status: {status}")
                 return False
                 
-            # Wait before next check
-            time.sleep(check_interval)
+            # Poll quickly at first, then back off towards check_interval
+            time.sleep(min(delay, check_interval, max(timeout - elapsed, 0)))
+            delay *= 1.5
+
+def read_file(filepath):
+    """Read a file's raw bytes"""
+    with open(filepath, 'rb') as f:
+        return f.read()
 
 def deploy_to_arweave():
     # 1. First, export the app using shinylive
@@ -112,12 +121,14 @@ def deploy_to_arweave():
     
     # 4. Read the exported site directory
     print("Reading exported site files...")
-    site_files = {}
-    for root, _, files in os.walk("site"):
-        for file in files:
-            filepath = os.path.join(root, file)
-            with open(filepath, 'rb') as f:
-                site_files[filepath] = f.read()
+    paths = [
+        os.path.join(root, file)
+        for root, _, files in os.walk("site")
+        for file in files
+    ]
+    # Overlap the many small-file reads instead of doing them serially
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        site_files = dict(zip(paths, executor.map(read_file, paths)))
     
     # 5. Upload to Arweave
     print("Uploading to Arweave...")